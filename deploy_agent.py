@@ -4,16 +4,24 @@ Deployment Agent for Frontend and Backend Applications
 Handles GitHub cloning, environment setup, and Docker deployment
 """
 
+import base64
+import collections
+import filecmp
+import functools
+import io
+import json
 import os
 import subprocess
 import sys
 import shutil
-import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import zipfile
-import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from dotenv import load_dotenv
 import logging
 
 # Configure logging
@@ -24,32 +32,59 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class DeploymentAgent:
+    # Local files that are never overwritten by repository updates
+    PRESERVE_FILES = {'.env.local', '.env.local.example', 'Dockerfile'}
+    # Services the agent builds and deploys (never the agent itself)
+    SERVICES = ("frontend", "backend")
+    # buildx builder (docker-container driver) that holds the bake layer cache
+    BUILDX_BUILDER = "jalin-builder"
+    
     def __init__(self):
         self.base_dir = Path(__file__).parent
         self.frontend_dir = self.base_dir / "frontend"
         self.backend_dir = self.base_dir / "backend"
-        self.github_token = None
         
-        # Load environment variables
+        # Load environment variables. docker compose injects .env.local through
+        # env_file and doesn't mount the file, so it is only parsed (and dotenv
+        # imported) when running outside Docker. Variables already set win.
         env_file = self.base_dir / ".env.local"
         if env_file.exists():
+            from dotenv import load_dotenv
             load_dotenv(env_file)
-            self.github_token = os.getenv("GITHUB_TOKEN")
-        else:
-            logger.warning(".env.local not found. Please create it with GITHUB_TOKEN")
+        self.github_token = os.getenv("GITHUB_TOKEN")
+        if not self.github_token:
+            logger.warning("GITHUB_TOKEN not set. Please add it to .env.local")
+        
+        # Shared HTTP session so GitHub API calls reuse pooled TLS connections
+        # and transient 5xx responses are retried instead of failing the deploy.
+        # The underlying urllib3 pool is thread-safe, so both clone workers share it.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": "application/vnd.github.v3+json", "User-Agent": "jalin-deploy-agent/1.0"})
+        if self.github_token:
+            self.session.headers.update({"Authorization": f"token {self.github_token}"})
+        
+        # ETags of the last downloaded zipball per repository, so unchanged
+        # repositories can be skipped with a conditional request
+        self.clone_cache_file = self.base_dir / ".clone_cache.json"
+        self._clone_cache_lock = threading.Lock()
+        
+        # Resolve docker compose (v2) vs docker-compose (v1) once; the available
+        # CLI doesn't change while the agent runs
+        self._compose_base, self._project_flag = self._detect_compose()
+        # Whether the bake builder exists; checked on first build
+        self._cache_builder_ready = None
         
-    def check_command(self, command):
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def check_command(command):
         """Check if a command is available in the system"""
-        try:
-            subprocess.run(
-                ["which", command],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            return True
-        except subprocess.CalledProcessError:
-            return False
+        return shutil.which(command) is not None
     
     def verify_repo_cloned(self, target_dir, repo_name, required_files=None):
         """Verify that repository is fully downloaded and contains expected files"""
@@ -60,29 +95,121 @@ class DeploymentAgent:
         if not target_dir.is_dir():
             return False
         
-        # Check if directory has files (not empty)
+        # Read the directory once; the same listing answers both the emptiness
+        # check and the required-file lookups
         try:
-            if not any(target_dir.iterdir()):
-                logger.warning(f"{repo_name} directory exists but is empty")
-                return False
-        except Exception as e:
+            with os.scandir(target_dir) as entries:
+                names = {entry.name for entry in entries}
+        except OSError as e:
             logger.warning(f"Could not check {repo_name} directory contents: {e}")
             return False
         
+        if not names:
+            logger.warning(f"{repo_name} directory exists but is empty")
+            return False
+        
         # Check for required files if specified
-        if required_files:
-            missing_files = []
-            for file_name in required_files:
-                file_path = target_dir / file_name
-                if not file_path.exists():
-                    missing_files.append(file_name)
-            
-            if missing_files:
-                logger.warning(f"{repo_name} missing expected files: {', '.join(missing_files)}")
-                return False
+        missing_files = [f for f in (required_files or ()) if f not in names]
+        if missing_files:
+            logger.warning(f"{repo_name} missing expected files: {', '.join(missing_files)}")
+            return False
         
         return True
     
+    def _zip_member_unchanged(self, info, target_file):
+        """Check whether target_file already holds the contents of zip entry info.
+        Compares size first (one stat) and only then the CRC-32 recorded in the zip."""
+        try:
+            if target_file.stat().st_size != info.file_size:
+                return False
+            crc = 0
+            with open(target_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(128 * 1024), b''):
+                    crc = zlib.crc32(chunk, crc)
+            return crc == info.CRC
+        except OSError:
+            return False
+    
+    def _file_unchanged(self, source_file, target_file):
+        """Check whether target_file already has the same contents as source_file"""
+        try:
+            if source_file.stat().st_size != target_file.stat().st_size:
+                return False
+            return filecmp.cmp(source_file, target_file, shallow=False)
+        except OSError:
+            return False
+    
+    def _copy_file(self, source_file, target_file):
+        """Copy a single file during a merge, replacing the target if it exists.
+        Handles permission errors when writing to mounted volumes.
+        Contents are copied with shutil.copyfile, which uses the kernel's zero-copy
+        path (sendfile) on Linux; of the metadata only the mode is carried over,
+        since executable bits in a git checkout are meaningful."""
+        # Skip the write entirely when the target is already identical,
+        # but still pick up mode changes
+        if self._file_unchanged(source_file, target_file):
+            shutil.copymode(source_file, target_file)
+            return
+        try:
+            shutil.copyfile(source_file, target_file)
+            shutil.copymode(source_file, target_file)
+        except PermissionError as e:
+            logger.warning(f"Permission error copying {source_file.name}, trying with chmod...")
+            # Try to fix permissions and retry
+            try:
+                os.chmod(target_file.parent, 0o755)
+                shutil.copyfile(source_file, target_file)
+                shutil.copymode(source_file, target_file)
+            except Exception as e2:
+                logger.error(f"Failed to copy {source_file.name} even with permission fix: {e2}")
+                raise
+        except Exception as e:
+            logger.error(f"Error copying {source_file.name}: {e}")
+            raise
+    
+    def _make_dirs(self, dirs):
+        """Create each directory once, shallowest first, so parents always exist
+        before their children and no directory is mkdir'ed twice"""
+        for directory in sorted(dirs, key=lambda p: len(p.parts)):
+            directory.mkdir(parents=True, exist_ok=True)
+    
+    def _copy_symlink(self, source_link, target_link):
+        """Recreate the symlink source_link at target_link, replacing a file or
+        link already there. A real directory in the way is left alone."""
+        if target_link.is_dir() and not target_link.is_symlink():
+            logger.warning(f"Not replacing directory {target_link} with a symlink")
+            return
+        if target_link.is_symlink() and os.readlink(target_link) == os.readlink(source_link):
+            return
+        if target_link.is_symlink() or target_link.exists():
+            target_link.unlink()
+        os.symlink(os.readlink(source_link), target_link)
+    
+    def _collect_merge_pairs(self, source_dir, target_dir, preserve_files, copy_pairs, needed_dirs, links):
+        """Recursively walk source_dir, collecting the target directories to create,
+        the (source, target) file pairs to copy and the symlinks to recreate.
+        Uses os.scandir so entry types come from the directory listing instead of
+        an extra stat per entry."""
+        needed_dirs.add(target_dir)
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                target_entry = target_dir / entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    self._collect_merge_pairs(Path(entry.path), target_entry, preserve_files, copy_pairs, needed_dirs, links)
+                    continue
+                
+                # Preserve special files - don't overwrite if they exist (even with a symlink)
+                if entry.name in preserve_files and target_entry.exists():
+                    logger.debug(f"Preserving existing {entry.name} - not overwriting")
+                    continue
+                
+                # A link to a directory must not be copied as a file
+                if entry.is_symlink():
+                    links.append((Path(entry.path), target_entry))
+                    continue
+                
+                copy_pairs.append((Path(entry.path), target_entry))
+    
     def _merge_directories(self, source_dir, target_dir):
         """Merge source directory into target directory, like git pull.
         Files from source replace files in target, but files only in target are preserved.
@@ -90,53 +217,119 @@ class DeploymentAgent:
         source_path = Path(source_dir)
         target_path = Path(target_dir)
         
-        # List of files to preserve (don't overwrite these from source)
-        preserve_files = {'.env.local', '.env.local.example', 'Dockerfile'}
+        # Walk the source tree and collect the directories and copies to make
+        copy_pairs = []
+        needed_dirs = set()
+        links = []
+        self._collect_merge_pairs(source_path, target_path, self.PRESERVE_FILES, copy_pairs, needed_dirs, links)
+        
+        # Create every target directory up front so the parallel copies below
+        # never need to mkdir
+        self._make_dirs(needed_dirs)
+        
+        # Copy files in parallel; the GIL is released during the underlying
+        # read/write syscalls, so threads overlap per-file I/O latency
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._copy_file, src, dst) for src, dst in copy_pairs]
+            for future in as_completed(futures):
+                future.result()
+        
+        for source_link, target_link in links:
+            self._copy_symlink(source_link, target_link)
+        
+        logger.info(f"✓ Merged updates into {target_dir} (preserved .env.local and Dockerfiles)")
+    
+    def _write_zip_member(self, zip_ref, info, target_file):
+        """Write a single zip entry to target_file, replacing it if it exists.
+        Handles permission errors when writing to mounted volumes."""
+        try:
+            with zip_ref.open(info) as src, open(target_file, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 128 * 1024)
+        except PermissionError as e:
+            logger.warning(f"Permission error writing {target_file.name}, trying with chmod...")
+            # Try to fix permissions and retry
+            try:
+                os.chmod(target_file.parent, 0o755)
+                with zip_ref.open(info) as src, open(target_file, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 128 * 1024)
+                os.chmod(target_file, 0o644)
+            except Exception as e2:
+                logger.error(f"Failed to write {target_file.name} even with permission fix: {e2}")
+                raise
+        except Exception as e:
+            logger.error(f"Error writing {target_file.name}: {e}")
+            raise
+    
+    def _extract_zip_into(self, zip_data, target_dir):
+        """Extract a GitHub zipball directly into target_dir.
+        Entries are written straight to their final path (the owner-repo-hash root
+        folder is stripped), skipping the extract-to-temp-then-copy pass.
+        Files only in target are kept and PRESERVE_FILES are not overwritten.
+        File entries are decompressed and written in parallel."""
+        target_path = Path(target_dir)
         
-        # Create target directory if it doesn't exist
-        target_path.mkdir(parents=True, exist_ok=True)
+        # First pass: collect the directories and files to write, so all
+        # directories are created once and the parallel writers never race on mkdir
+        jobs = []
+        needed_dirs = {target_path}
+        with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_ref:
+            infos = zip_ref.infolist()
+        if not infos:
+            raise ValueError("Zip file appears to be empty")
         
-        # Walk through all files in source directory
-        for root, dirs, files in os.walk(source_path):
-            # Calculate relative path from source root
-            rel_path = os.path.relpath(root, source_path)
+        for info in infos:
+            rel_path = info.filename.split('/', 1)[1] if '/' in info.filename else ''
+            if not rel_path:
+                continue
+            # Never write outside the target directory
+            if rel_path.startswith('/') or '..' in Path(rel_path).parts:
+                logger.warning(f"Skipping unsafe zip entry: {info.filename}")
+                continue
             
-            # Create corresponding directory in target
-            if rel_path == '.':
-                target_subdir = target_path
-            else:
-                target_subdir = target_path / rel_path
-                target_subdir.mkdir(parents=True, exist_ok=True)
+            target_file = target_path / rel_path
+            if info.is_dir():
+                needed_dirs.add(target_file)
+                continue
             
-            # Copy all files from source to target
-            for file in files:
-                source_file = Path(root) / file
-                target_file = target_subdir / file
-                
-                # Preserve special files - don't overwrite if they exist
-                if file in preserve_files and target_file.exists():
-                    logger.debug(f"Preserving existing {file} - not overwriting")
-                    continue
-                
-                # Copy file, replacing if it exists
-                # Handle permission errors when writing to mounted volumes
-                try:
-                    shutil.copy2(source_file, target_file)
-                except PermissionError as e:
-                    logger.warning(f"Permission error copying {file}, trying with chmod...")
-                    # Try to fix permissions and retry
-                    try:
-                        os.chmod(target_file.parent, 0o755)
-                        shutil.copy2(source_file, target_file)
-                        os.chmod(target_file, 0o644)
-                    except Exception as e2:
-                        logger.error(f"Failed to copy {file} even with permission fix: {e2}")
-                        raise
-                except Exception as e:
-                    logger.error(f"Error copying {file}: {e}")
-                    raise
+            # Preserve special files - don't overwrite if they exist
+            if target_file.name in self.PRESERVE_FILES and target_file.exists():
+                logger.debug(f"Preserving existing {target_file.name} - not overwriting")
+                continue
+            
+            needed_dirs.add(target_file.parent)
+            jobs.append((info, target_file))
         
-        logger.info(f"✓ Merged updates into {target_dir} (preserved .env.local and Dockerfiles)")
+        self._make_dirs(needed_dirs)
+        
+        # Second pass: zlib releases the GIL while decompressing, so threads
+        # overlap decompression and writes. ZipFile objects aren't safe to share
+        # across threads, so each worker opens its own over the shared bytes.
+        local = threading.local()
+        open_handles = []
+        handles_lock = threading.Lock()
+        
+        def write_member(info, target_file):
+            zip_ref = getattr(local, "zip_ref", None)
+            if zip_ref is None:
+                zip_ref = local.zip_ref = zipfile.ZipFile(io.BytesIO(zip_data))
+                with handles_lock:
+                    open_handles.append(zip_ref)
+            # Skip the write entirely when the target is already identical
+            if self._zip_member_unchanged(info, target_file):
+                return False
+            self._write_zip_member(zip_ref, info, target_file)
+            return True
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+                futures = [executor.submit(write_member, info, dst) for info, dst in jobs]
+                written = sum(future.result() for future in as_completed(futures))
+        finally:
+            for zip_ref in open_handles:
+                zip_ref.close()
+        
+        logger.info(f"✓ Extracted {written} changed files into {target_dir} ({len(jobs) - written} unchanged)")
     
     def extract_repo_info(self, repo_url):
         """Extract owner and repo name from GitHub URL"""
@@ -152,8 +345,88 @@ class DeploymentAgent:
         
         raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
     
+    def _load_clone_cache(self):
+        """Load the saved zipball ETags, or an empty cache if unavailable"""
+        try:
+            with open(self.clone_cache_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_clone_etag(self, cache_key, etag):
+        """Record the ETag of the zipball that was just extracted"""
+        # Both clone workers may finish at the same time, so serialise the
+        # read-modify-write of the cache file
+        with self._clone_cache_lock:
+            cache = self._load_clone_cache()
+            if etag:
+                cache[cache_key] = etag
+            else:
+                cache.pop(cache_key, None)
+            try:
+                with open(self.clone_cache_file, "w") as f:
+                    json.dump(cache, f, indent=2)
+            except OSError as e:
+                logger.warning(f"Could not save clone cache: {e}")
+    
+    def _clone_with_git(self, owner, repo, target_dir, repo_name):
+        """Fetch the default branch with a shallow git clone and merge it into
+        target_dir. Returns False (after cleaning up) if the clone fails."""
+        logger.info(f"Cloning {repo_name} with git (shallow)...")
+        target_dir.parent.mkdir(parents=True, exist_ok=True)
+        stage_dir = target_dir.parent / f".{target_dir.name}.stage"
+        if stage_dir.exists():
+            shutil.rmtree(stage_dir)
+        
+        # Pass the token as an HTTP header through the environment so it never
+        # appears in the process list or in git's error output
+        credentials = base64.b64encode(f"x-access-token:{self.github_token}".encode()).decode()
+        env = os.environ.copy()
+        env.update({
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.https://github.com/.extraheader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+        })
+        
+        try:
+            result = subprocess.run(
+                ["git", "clone", "--depth=1", "--single-branch", "--quiet",
+                 f"https://github.com/{owner}/{repo}.git", str(stage_dir)],
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=600
+            )
+            if result.returncode != 0:
+                logger.warning(f"git clone exited with {result.returncode}: {result.stderr.strip()[-500:]}")
+                return False
+            
+            # Match the zipball contents: no git metadata in the deployed tree
+            shutil.rmtree(stage_dir / ".git", ignore_errors=True)
+            
+            if target_dir.exists():
+                logger.info(f"Merging {repo_name} updates (preserving local files like Dockerfiles)...")
+                self._merge_directories(stage_dir, target_dir)
+            else:
+                stage_dir.rename(target_dir)
+                logger.info(f"Created {repo_name} directory at {target_dir}")
+            
+            logger.info(f"✓ Successfully cloned {repo_name}")
+            return True
+        except subprocess.TimeoutExpired:
+            logger.warning(f"git clone timed out for {repo_name}")
+            return False
+        finally:
+            # Clean up staging directory
+            if stage_dir.exists():
+                try:
+                    shutil.rmtree(stage_dir)
+                except Exception as e:
+                    logger.warning(f"Could not clean up staging directory: {e}")
+    
     def clone_repository(self, repo_url, target_dir, repo_name):
-        """Download GitHub repository using API, always gets latest version"""
+        """Download GitHub repository (shallow git clone, or API zipball), always gets latest version"""
         # Always download latest version, even if directory exists
         if target_dir.exists():
             logger.info(f"{repo_name} directory exists. Updating with latest from GitHub...")
@@ -165,132 +438,132 @@ class DeploymentAgent:
         try:
             # Extract owner and repo name from URL
             owner, repo = self.extract_repo_info(repo_url)
-            logger.info(f"Downloading {repo_name} from GitHub API...")
             
-            # Try to get default branch from API, fallback to main
-            default_branch = "main"
-            try:
-                repo_info_url = f"https://api.github.com/repos/{owner}/{repo}"
-                repo_response = requests.get(
-                    repo_info_url,
-                    headers={"Authorization": f"token {self.github_token}"},
-                    timeout=10
-                )
-                if repo_response.status_code == 200:
-                    repo_data = repo_response.json()
-                    default_branch = repo_data.get("default_branch", "main")
-                    logger.info(f"Using branch: {default_branch}")
-            except Exception as e:
-                logger.warning(f"Could not determine default branch, using 'main': {e}")
+            # A shallow clone transfers an already-compressed pack and needs no
+            # zip extraction, so prefer it and keep the API zipball as fallback
+            if self.check_command("git"):
+                if self._clone_with_git(owner, repo, target_dir, repo_name):
+                    if self.verify_repo_cloned(target_dir, repo_name):
+                        return True
+                    logger.error(f"Clone completed but verification failed for {repo_name}")
+                    return False
+                logger.warning(f"git clone failed for {repo_name}, falling back to GitHub API download...")
+            
+            logger.info(f"Downloading {repo_name} from GitHub API...")
             
             # GitHub API endpoint for downloading repository as zipball
-            api_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{default_branch}"
+            # Without a ref, GitHub redirects to the default branch, so no
+            # separate repository metadata request is needed
+            api_url = f"https://api.github.com/repos/{owner}/{repo}/zipball"
             
-            headers = {
-                "Authorization": f"token {self.github_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
+            # Send the previous ETag so GitHub can answer 304 when nothing changed.
+            # Only trust that when the existing checkout is actually usable.
+            cache_key = f"{owner}/{repo}"
+            headers = {}
+            saved_etag = self._load_clone_cache().get(cache_key)
+            if saved_etag and self.verify_repo_cloned(target_dir, repo_name):
+                headers["If-None-Match"] = saved_etag
             
-            # Create a temporary file for the zip
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
-                tmp_zip_path = tmp_file.name
+            # Download the repository
+            # (connect, read) timeout: a stalled download fails instead of hanging the deploy
+            response = self.session.get(api_url, headers=headers, stream=True, timeout=(10, 60))
+            if response.status_code == 304:
+                response.close()
+                logger.info(f"✓ {repo_name} is up-to-date (not modified since last download)")
+                return True
+            response.raise_for_status()
             
-            try:
-                # Download the repository
-                response = requests.get(api_url, headers=headers, stream=True)
-                response.raise_for_status()
-                
-                # Save to temporary file
-                with open(tmp_zip_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                logger.info(f"Downloaded {repo_name} successfully. Extracting and merging...")
-                
-                # Create parent directory if needed
-                target_dir.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Extract zip file to temporary location first
-                # Use a location that's not a mounted volume to avoid permission issues
-                extract_temp = Path("/tmp") / f"_temp_extract_{repo_name}_{int(time.time())}"
-                if extract_temp.exists():
-                    shutil.rmtree(extract_temp)
-                extract_temp.mkdir(parents=True, exist_ok=True)
-                
+            # Redirect target looks like .../legacy.zip/refs/heads/<branch>
+            if "/refs/heads/" in response.url:
+                logger.info(f"Using branch: {response.url.split('/refs/heads/', 1)[1]}")
+            
+            # Buffer the archive in memory instead of writing it to a temp
+            # file and reading it back, which doubled the disk I/O
+            zip_buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=128 * 1024):
+                zip_buffer.write(chunk)
+            zip_buffer.seek(0)
+            
+            logger.info(f"Downloaded {repo_name} successfully. Extracting and merging...")
+            
+            # Create parent directory if needed
+            target_dir.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Share the archive bytes read-only so extraction workers can each
+            # open their own ZipFile over them
+            zip_data = zip_buffer.getvalue()
+            
+            if target_dir.exists():
+                # Smart merge: write each entry straight to its final location
+                # This preserves local files (like Dockerfiles) that aren't in the repo
+                logger.info(f"Merging {repo_name} updates (preserving local files like Dockerfiles)...")
+                try:
+                    self._extract_zip_into(zip_data, target_dir)
+                except Exception as e:
+                    logger.error(f"Error during merge: {e}")
+                    raise
+            else:
+                # Fresh install: extract next to the target (same filesystem, so
+                # rename is guaranteed to work) and move it into place
+                stage_dir = target_dir.parent / f".{target_dir.name}.stage"
+                if stage_dir.exists():
+                    shutil.rmtree(stage_dir)
                 try:
-                    with zipfile.ZipFile(tmp_zip_path, 'r') as zip_ref:
-                        # Extract all files
-                        zip_ref.extractall(extract_temp)
-                        
-                        # Find the root folder (GitHub adds owner-repo-hash prefix)
-                        zip_members = zip_ref.namelist()
-                        if not zip_members:
-                            raise ValueError("Zip file appears to be empty")
-                        
-                        root_folder = zip_members[0].split('/')[0]
-                        extracted_folder = extract_temp / root_folder
-                        
-                        if not extracted_folder.exists():
-                            raise ValueError(f"Expected folder {root_folder} not found in extracted files")
-                        
-                        # Smart merge: copy files from extracted folder to target
-                        # This preserves local files (like Dockerfiles) that aren't in the repo
-                        if target_dir.exists():
-                            logger.info(f"Merging {repo_name} updates (preserving local files like Dockerfiles)...")
-                            try:
-                                self._merge_directories(extracted_folder, target_dir)
-                            except Exception as e:
-                                logger.error(f"Error during merge: {e}")
-                                raise
-                        else:
-                            # If target doesn't exist, just move the extracted folder
-                            extracted_folder.rename(target_dir)
-                            logger.info(f"Created {repo_name} directory at {target_dir}")
-                        
+                    self._extract_zip_into(zip_data, stage_dir)
+                    stage_dir.rename(target_dir)
+                    logger.info(f"Created {repo_name} directory at {target_dir}")
                 finally:
-                    # Clean up temp extract directory
-                    if extract_temp.exists():
+                    # Clean up staging directory
+                    if stage_dir.exists():
                         try:
-                            shutil.rmtree(extract_temp)
+                            shutil.rmtree(stage_dir)
                         except Exception as e:
-                            logger.warning(f"Could not clean up temp directory: {e}")
-                
-                logger.info(f"✓ Successfully downloaded and extracted {repo_name}")
-                
-                # Verify the download
-                if self.verify_repo_cloned(target_dir, repo_name):
-                    return True
-                else:
-                    logger.error(f"Download completed but verification failed for {repo_name}")
-                    return False
-                    
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_zip_path):
-                    os.unlink(tmp_zip_path)
+                            logger.warning(f"Could not clean up staging directory: {e}")
+            
+            logger.info(f"✓ Successfully downloaded and extracted {repo_name}")
+            
+            # Verify the download
+            if self.verify_repo_cloned(target_dir, repo_name):
+                self._save_clone_etag(cache_key, response.headers.get("ETag"))
+                return True
+            else:
+                logger.error(f"Download completed but verification failed for {repo_name}")
+                return False
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to download {repo_name} from GitHub API: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response body: {e.response.text[:200]}")
+                # Only pull the first 200 bytes; the zipball request is streamed,
+                # so .text would download and decode the whole error page
+                try:
+                    body = next(e.response.iter_content(chunk_size=200), b"")
+                except Exception:
+                    body = b""
+                finally:
+                    e.response.close()
+                logger.error(f"Response body: {body!r}")
             return False
         except Exception as e:
             logger.error(f"Unexpected error downloading {repo_name}: {e}")
             return False
     
-    def is_running_in_docker(self):
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def is_running_in_docker():
         """Check if we're running inside a Docker container"""
         # Check for .dockerenv file (present in Docker containers)
         if Path("/.dockerenv").exists():
             return True
-        # Check cgroup (another Docker indicator)
-        try:
-            with open("/proc/self/cgroup", "r") as f:
-                if "docker" in f.read():
-                    return True
-        except:
-            pass
+        # Check cgroup (another Docker indicator); /proc/1/cgroup is the more
+        # reliable signal on cgroup v2 hosts. Stop at the first matching line.
+        for cgroup_file in ("/proc/self/cgroup", "/proc/1/cgroup"):
+            try:
+                with open(cgroup_file, "r") as f:
+                    if any("docker" in line for line in f):
+                        return True
+            except OSError:
+                pass
         return False
     
     def setup_backend(self):
@@ -316,36 +589,33 @@ class DeploymentAgent:
                 subprocess.run(
                     [sys.executable, "-m", "venv", str(venv_path)],
                     check=True,
-                    cwd=self.backend_dir
+                    cwd=self.backend_dir,
+                    timeout=300
                 )
                 logger.info("✓ Virtual environment created")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
                 logger.error(f"Failed to create venv: {e}")
                 return False
         
         # Install requirements if venv exists
         if venv_path.exists() and requirements_file.exists():
             logger.info("Installing/updating backend requirements...")
-            pip_cmd = str(venv_path / "bin" / "pip")
+            python_cmd = str(venv_path / "bin" / "python")
             if sys.platform == "win32":
-                pip_cmd = str(venv_path / "Scripts" / "pip.exe")
+                python_cmd = str(venv_path / "Scripts" / "python.exe")
             
             try:
-                # Upgrade pip first
+                # Upgrade pip and install/update requirements in one resolver pass.
+                # Run via "python -m pip" so pip can upgrade itself in the same call.
                 subprocess.run(
-                    [pip_cmd, "install", "--upgrade", "pip"],
+                    [python_cmd, "-m", "pip", "install", "--upgrade", "pip",
+                     "-r", str(requirements_file), "--prefer-binary"],
                     check=True,
                     cwd=self.backend_dir,
-                    capture_output=True
-                )
-                # Install/update requirements
-                subprocess.run(
-                    [pip_cmd, "install", "-r", str(requirements_file)],
-                    check=True,
-                    cwd=self.backend_dir
+                    timeout=1200  # 20 minute timeout for installs
                 )
                 logger.info("✓ Backend requirements installed/updated")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
                 logger.error(f"Failed to install requirements: {e}")
                 return False
         elif not requirements_file.exists():
@@ -359,7 +629,8 @@ class DeploymentAgent:
             node_version = subprocess.run(
                 ["node", "--version"],
                 capture_output=True,
-                text=True
+                text=True,
+                timeout=30
             ).stdout.strip()
             logger.info(f"Node.js is already installed: {node_version} - Skipping installation")
             return True
@@ -387,25 +658,32 @@ class DeploymentAgent:
         package_json = self.frontend_dir / "package.json"
         if package_json.exists():
             logger.info("Installing frontend dependencies...")
-            try:
-                subprocess.run(
-                    ["npm", "install", "--force"],
-                    check=True,
-                    cwd=self.frontend_dir
-                )
-                logger.info("✓ Frontend dependencies installed")
-            except subprocess.CalledProcessError as e:
-                logger.warning(f"npm install --force failed, trying with --legacy-peer-deps...")
+            # npm ci installs straight from the lockfile without re-resolving the
+            # tree, so prefer it when a lockfile exists and fall back to npm install
+            install_cmds = []
+            if (self.frontend_dir / "package-lock.json").exists():
+                install_cmds.append(["npm", "ci"])
+            install_cmds += [
+                ["npm", "install", "--force"],
+                ["npm", "install", "--legacy-peer-deps"],
+            ]
+            
+            for i, install_cmd in enumerate(install_cmds):
                 try:
                     subprocess.run(
-                        ["npm", "install", "--legacy-peer-deps"],
+                        install_cmd,
                         check=True,
-                        cwd=self.frontend_dir
+                        cwd=self.frontend_dir,
+                        timeout=1200  # 20 minute timeout for installs
                     )
-                    logger.info("✓ Frontend dependencies installed with --legacy-peer-deps")
-                except subprocess.CalledProcessError as e2:
-                    logger.error(f"Failed to install frontend dependencies: {e2}")
-                    return False
+                    logger.info(f"✓ Frontend dependencies installed with '{' '.join(install_cmd)}'")
+                    break
+                except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                    if i + 1 < len(install_cmds):
+                        logger.warning(f"{' '.join(install_cmd)} failed, trying {' '.join(install_cmds[i + 1])}...")
+                    else:
+                        logger.error(f"Failed to install frontend dependencies: {e}")
+                        return False
             
             # Build production version with Docker service URL for internal communication
             logger.info("Building frontend for production...")
@@ -418,18 +696,145 @@ class DeploymentAgent:
                     ["npm", "run", "build"],
                     check=True,
                     cwd=self.frontend_dir,
-                    env=env
+                    env=env,
+                    timeout=1800  # 30 minute timeout for builds
                 )
                 logger.info("✓ Frontend production build completed")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
                 logger.warning(f"Build command failed (might not have build script): {e}")
         else:
             logger.warning(f"package.json not found in {self.frontend_dir}")
         
         return True
     
-    def build_docker_images(self):
-        """Build Docker images for all services - optimized for speed"""
+    def _detect_compose(self):
+        """Return (command_base, project_flag) for the available Docker Compose CLI:
+        docker compose (v2), then docker-compose (v1). (None, None) if neither works."""
+        compose_commands = [
+            (["docker", "compose"], "-p"),  # v2 uses -p
+            (["docker-compose"], "--project-name")  # v1 uses --project-name
+        ]
+        for cmd_base, project_flag in compose_commands:
+            try:
+                subprocess.run(cmd_base + ["version"],
+                             capture_output=True, check=True, timeout=5)
+                return cmd_base, project_flag
+            except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+                continue
+        
+        logger.error("❌ Neither 'docker compose' nor 'docker-compose' found! Deployments will fail.")
+        return None, None
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def has_buildx():
+        """Check if the docker buildx plugin is available"""
+        try:
+            subprocess.run(["docker", "buildx", "version"],
+                         capture_output=True, check=True, timeout=5)
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            return False
+    
+    def _ensure_cache_builder(self):
+        """Make sure the docker-container buildx builder used for bake exists.
+        The default "docker" driver can't export a local layer cache (cache-to
+        type=local), so bake runs on its own BuildKit container instead.
+        Returns the builder name, or None if it can't be created."""
+        if self._cache_builder_ready is None:
+            try:
+                inspect = subprocess.run(
+                    ["docker", "buildx", "inspect", self.BUILDX_BUILDER],
+                    capture_output=True, check=False, timeout=30
+                )
+                if inspect.returncode == 0:
+                    self._cache_builder_ready = True
+                else:
+                    logger.info(f"Creating buildx builder {self.BUILDX_BUILDER} (docker-container driver) for the layer cache...")
+                    create = subprocess.run(
+                        ["docker", "buildx", "create", "--name", self.BUILDX_BUILDER, "--driver", "docker-container"],
+                        capture_output=True, text=True, check=False, timeout=60
+                    )
+                    if create.returncode != 0:
+                        logger.warning(f"Could not create buildx builder: {create.stderr.strip()}")
+                    self._cache_builder_ready = create.returncode == 0
+            except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+                logger.warning(f"Could not set up buildx builder: {e}")
+                self._cache_builder_ready = False
+        return self.BUILDX_BUILDER if self._cache_builder_ready else None
+    
+    def _run_streaming(self, cmd, cwd, timeout, tail_lines=200):
+        """Run a long build/deploy command, logging its combined stdout/stderr line
+        by line as it arrives. Only the last tail_lines lines are kept in memory;
+        they are logged again if the command fails. Returns True on success; the
+        process is killed if it exceeds timeout."""
+        tail = collections.deque(maxlen=tail_lines)
+        proc = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            # A stray non-UTF-8 byte must not kill the reader and stall the pipe
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1
+        )
+        
+        def pump():
+            for line in proc.stdout:
+                line = line.rstrip()
+                tail.append(line)
+                logger.info(f"  {line}")
+        
+        reader = threading.Thread(target=pump, daemon=True)
+        reader.start()
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            logger.error(f"Command timed out after {timeout}s: {' '.join(cmd)}")
+        # Don't hang if a killed process left a child holding the pipe open
+        reader.join(timeout=10)
+        
+        if proc.returncode != 0:
+            logger.error(f"Command failed (exit code {proc.returncode}): {' '.join(cmd)}")
+            logger.error("Last output:\n" + "\n".join(tail))
+            return False
+        return True
+    
+    def _bake_images(self, compose_dir, services):
+        """Build the given services with docker buildx bake, reusing a local
+        BuildKit layer cache across builds so cold builds start warm"""
+        builder = self._ensure_cache_builder()
+        if builder is None:
+            return False
+        cache_dir = compose_dir / ".buildx-cache"
+        
+        bake_cmd = ["docker", "buildx", "bake", "--builder", builder, "-f", "docker-compose.yml", "--load"]
+        for service in services:
+            bake_cmd += [
+                # Tag like compose would, so "up" picks up the baked images
+                "--set", f"{service}.tags=jalindeploy-{service}",
+                "--set", f"{service}.cache-from=type=local,src={cache_dir / service}",
+                "--set", f"{service}.cache-to=type=local,dest={cache_dir / (service + '-new')},mode=max",
+            ]
+        bake_cmd += list(services)
+        
+        if not self._run_streaming(bake_cmd, cwd=compose_dir, timeout=1800):  # 30 minute timeout for builds
+            return False
+        
+        # Swap in the new cache so the old one doesn't grow without bound
+        for service in services:
+            new_cache = cache_dir / f"{service}-new"
+            if new_cache.exists():
+                shutil.rmtree(cache_dir / service, ignore_errors=True)
+                new_cache.rename(cache_dir / service)
+        return True
+    
+    def build_docker_images(self, services=SERVICES):
+        """Build Docker images for the given services - optimized for speed"""
         logger.info("Building Docker images (using cache for faster builds)...")
         
         docker_compose_file = self.base_dir / "docker-compose.yml"
@@ -450,55 +855,40 @@ class DeploymentAgent:
         logger.info("Repositories verified. Proceeding with Docker build...")
         
         try:
-            # Build only frontend and backend (not the agent itself)
-            # The agent shouldn't rebuild itself during updates
-            # Check for docker compose (v2) vs docker-compose (v1)
-            build_cmd = None
-            try:
-                subprocess.run(["docker", "compose", "version"], 
-                             capture_output=True, check=True, timeout=5)
-                # docker compose v2 uses -p flag
-                build_cmd = ["docker", "compose", "-p", "jalindeploy", "build", "--parallel", "frontend", "backend"]
-            except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-                # docker-compose v1 uses --project-name flag
-                build_cmd = ["docker-compose", "--project-name", "jalindeploy", "build", "--parallel", "frontend", "backend"]
-            
             # When running in Docker, use the mounted project directory
             if self.is_running_in_docker():
                 compose_dir = Path("/app/project")
             else:
                 compose_dir = self.base_dir
             
-            subprocess.run(
-                build_cmd,
-                check=True,
-                cwd=compose_dir
-            )
+            # Prefer buildx bake with a persistent layer cache; fall back to a
+            # plain compose build if buildx is missing or the bake fails
+            if self.has_buildx():
+                if self._bake_images(compose_dir, services):
+                    logger.info("✓ Docker images built successfully")
+                    return True
+                logger.warning("docker buildx bake failed, falling back to compose build...")
+            
+            # Build only frontend and/or backend (not the agent itself)
+            # The agent shouldn't rebuild itself during updates
+            build_cmd = self._compose_base + [self._project_flag, "jalindeploy", "build", "--parallel"] + list(services)
+            
+            if not self._run_streaming(build_cmd, cwd=compose_dir, timeout=1800):  # 30 minute timeout for builds
+                logger.error("Failed to build Docker images")
+                return False
             logger.info("✓ Docker images built successfully")
             return True
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             logger.error(f"Failed to build Docker images: {e}")
             return False
     
-    def deploy(self):
-        """Deploy all services using Docker Compose"""
+    def deploy(self, services=SERVICES, build=True):
+        """Deploy the given services using Docker Compose.
+        Pass build=False when the images were just built (build_docker_images),
+        so compose doesn't rebuild them without the bake layer cache."""
         logger.info("Deploying services to Docker...")
         
         try:
-            # Check for docker compose (v2) vs docker-compose (v1)
-            compose_cmd_base = None
-            project_flag = None
-            try:
-                subprocess.run(["docker", "compose", "version"], 
-                             capture_output=True, check=True, timeout=5)
-                # docker compose v2 uses -p flag
-                compose_cmd_base = ["docker", "compose"]
-                project_flag = "-p"
-            except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-                # docker-compose v1 uses --project-name flag
-                compose_cmd_base = ["docker-compose"]
-                project_flag = "--project-name"
-            
             # When running in Docker, use the mounted project directory
             if self.is_running_in_docker():
                 compose_dir = Path("/app/project")
@@ -507,81 +897,89 @@ class DeploymentAgent:
             
             # Forcefully stop and remove ONLY frontend and backend containers (agent stays running)
             # This ensures containers are removed before recreating them in the same network
-            logger.info("Stopping and removing frontend and backend containers (agent will stay running)...")
-            containers_to_remove = ["jalin-frontend", "jalin-backend"]
+            logger.info(f"Stopping and removing {' and '.join(services)} containers (agent will stay running)...")
+            containers_to_remove = [f"jalin-{service}" for service in services]
+            # rm -f force-stops running containers and returns once they're gone,
+            # so one call handles both without a separate stop or delay
+            rm_result = subprocess.run(
+                ["docker", "rm", "-f"] + containers_to_remove,
+                capture_output=True,
+                text=True,
+                check=False,  # Don't fail if a container doesn't exist
+                timeout=120
+            )
+            removed = set(rm_result.stdout.split())
             for container_name in containers_to_remove:
-                # Stop container if running
-                stop_result = subprocess.run(
-                    ["docker", "stop", container_name],
-                    capture_output=True,
-                    check=False  # Don't fail if container doesn't exist
-                )
-                # Force remove container (removes even if running)
-                rm_result = subprocess.run(
-                    ["docker", "rm", "-f", container_name],
-                    capture_output=True,
-                    check=False  # Don't fail if container doesn't exist
-                )
-                if rm_result.returncode == 0:
+                if container_name in removed:
                     logger.info(f"✓ Removed {container_name}")
-                elif stop_result.returncode != 0 and rm_result.returncode != 0:
+                else:
                     logger.debug(f"Container {container_name} doesn't exist (will be created)")
             
-            # Small delay to ensure containers are fully removed
-            time.sleep(1)
-            
             # Start ONLY frontend and backend services (agent is not touched)
             # They will be recreated in the same network (jalin-network) where agent is running
             # Use project flag to ensure we use "jalindeploy" instead of directory name
-            logger.info("Recreating frontend and backend services in the same network...")
-            up_cmd = compose_cmd_base + [project_flag, "jalindeploy", "up", "-d", "--no-deps", "--build", "frontend", "backend"]
+            logger.info(f"Recreating {' and '.join(services)} in the same network...")
+            up_cmd = self._compose_base + [self._project_flag, "jalindeploy", "up", "-d", "--no-deps",
+                                           "--build" if build else "--no-build"] + list(services)
             # --no-deps ensures we don't touch the agent service
             # --project-name ensures we use jalindeploy network, not "project"
-            subprocess.run(
-                up_cmd,
-                check=True,
-                cwd=compose_dir
-            )
+            if not self._run_streaming(up_cmd, cwd=compose_dir, timeout=1800):  # 30 minute timeout, up may have to build
+                logger.error("Failed to deploy services")
+                return False
             logger.info("✓ Services deployed successfully")
             
             # Clean up old unused images (jalindeploy-frontend and jalindeploy-backend)
             # This removes the old images that are no longer in use
             logger.info("Cleaning up old unused images...")
-            old_images = ["jalindeploy-frontend", "jalindeploy-backend"]
+            old_images = [f"jalindeploy-{service}" for service in services]
             for image_name in old_images:
                 try:
                     # Remove dangling images (untagged) for this image name
                     result = subprocess.run(
                         ["docker", "image", "prune", "-f", "--filter", f"dangling=true"],
                         capture_output=True,
-                        check=False
+                        check=False,
+                        timeout=120
                     )
                     # Also try to remove old images with the exact name
                     subprocess.run(
                         ["docker", "rmi", "-f", image_name],
                         capture_output=True,
-                        check=False  # Don't fail if image doesn't exist
+                        check=False,  # Don't fail if image doesn't exist
+                        timeout=120
                     )
                 except Exception as e:
                     logger.debug(f"Could not clean up image {image_name}: {e}")
             
             logger.info("✓ Deployment and cleanup completed")
             return True
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
             logger.error(f"Failed to deploy services: {e}")
             return False
     
-    def run(self, fe_repo_url, be_repo_url):
-        """Main deployment flow"""
+    def run(self, fe_repo_url, be_repo_url, services=SERVICES):
+        """Main deployment flow. Both repositories are updated; only the given
+        services are rebuilt and recreated."""
         logger.info("=" * 60)
         logger.info("Starting Deployment Agent")
         logger.info("=" * 60)
         
+        # Fail before downloading anything if the images can't be deployed
+        if self._compose_base is None:
+            logger.error("❌ Neither 'docker compose' nor 'docker-compose' found!")
+            return False
+        
         # Step 1: Clone repositories
+        # Frontend and backend downloads are independent and network-bound,
+        # so run them concurrently and wait for both before continuing
         logger.info("\n[Step 1/5] Cloning repositories...")
-        if not self.clone_repository(fe_repo_url, self.frontend_dir, "Frontend"):
-            return False
-        if not self.clone_repository(be_repo_url, self.backend_dir, "Backend"):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                executor.submit(self.clone_repository, fe_repo_url, self.frontend_dir, "Frontend"): "Frontend",
+                executor.submit(self.clone_repository, be_repo_url, self.backend_dir, "Backend"): "Backend",
+            }
+            results = {futures[future]: future.result() for future in as_completed(futures)}
+        if not all(results.values()):
             return False
         
         # Step 2: Setup backend
@@ -594,14 +992,19 @@ class DeploymentAgent:
         if not self.setup_frontend():
             return False
         
+        # Nothing to rebuild (e.g. only docs changed): the code is up to date
+        if not services:
+            logger.info("\nNo services to rebuild, skipping steps 4 and 5")
+            return True
+        
         # Step 4: Build Docker images
         logger.info("\n[Step 4/5] Building Docker images...")
-        if not self.build_docker_images():
+        if not self.build_docker_images(services):
             return False
         
-        # Step 5: Deploy to Docker
+        # Step 5: Deploy to Docker, using the images built in step 4
         logger.info("\n[Step 5/5] Deploying to Docker...")
-        if not self.deploy():
+        if not self.deploy(services, build=False):
             return False
         
         logger.info("\n" + "=" * 60)
@@ -614,6 +1017,15 @@ class DeploymentAgent:
         return True
 
 
+def run_update(fe_repo_url, be_repo_url, agent=None, services=DeploymentAgent.SERVICES):
+    """Run a full deployment and return a process-style exit code (0 on success).
+    Pass an existing DeploymentAgent to reuse its HTTP session across runs, and
+    services to rebuild and recreate only some of the services."""
+    if agent is None:
+        agent = DeploymentAgent()
+    return 0 if agent.run(fe_repo_url, be_repo_url, services) else 1
+
+
 def main():
     """Main entry point"""
     import argparse
@@ -634,10 +1046,7 @@ def main():
     
     args = parser.parse_args()
     
-    agent = DeploymentAgent()
-    success = agent.run(args.fe_repo, args.be_repo)
-    
-    sys.exit(0 if success else 1)
+    sys.exit(run_update(args.fe_repo, args.be_repo))
 
 
 if __name__ == "__main__":
@@ -4,15 +4,24 @@ Auto-deploy Watcher - Monitors GitHub for new commits and redeploys automaticall
 Runs continuously in Docker container
 """
 
+import base64
+import hashlib
+import hmac
+import json
 import os
+import random
+import re
+import signal
 import subprocess
-import sys
+import threading
 import time
-import requests
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from dotenv import load_dotenv
 import logging
 from datetime import datetime
+from deploy_agent import DeploymentAgent, run_update
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,35 +29,283 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# owner and repo name from https://github.com/owner/repo(.git) or git@github.com:owner/repo.git
+GITHUB_REPO_RE = re.compile(r"github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$")
+
+# One GraphQL request that returns just the head commit of both repositories
+COMMITS_QUERY = """
+query($feOwner: String!, $feName: String!, $beOwner: String!, $beName: String!, $ref: String!) {
+  fe: repository(owner: $feOwner, name: $feName) { ref(qualifiedName: $ref) { target { oid } } }
+  be: repository(owner: $beOwner, name: $beName) { ref(qualifiedName: $ref) { target { oid } } }
+}
+"""
+
+# GraphQL error types meaning the token itself can't be used for the query
+GRAPHQL_AUTH_ERRORS = {"FORBIDDEN", "INSUFFICIENT_SCOPES"}
+
+# Longest wait before retrying a deploy of commits that failed to deploy
+DEPLOY_RETRY_MAX = 6 * 60 * 60
+
+# GitHub caps webhook payloads at 25 MB
+MAX_WEBHOOK_BODY = 25 * 1024 * 1024
+
+# Changed files that don't end up affecting a service's image: top-level project
+# docs and CI config. Other markdown may be built into the site, so it counts.
+NO_REBUILD_RE = re.compile(r"(?i)^((README|CHANGELOG|LICENSE)[^/]*|\.github/.*)$")
+
+# GitHub rejects API requests without a User-Agent
+USER_AGENT = "jalin-deploy-watcher/1.0"
+
+# Below this many remaining API requests, polls are spread out over the rest
+# of the rate-limit window
+RATE_LIMIT_LOW_WATER = 50
+
+# The compare API lists at most this many files; a longer diff is treated as unknown
+COMPARE_FILES_LIMIT = 300
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Receives GitHub push webhooks and hands them to the watcher (self.server.watcher).
+    Also answers GET /healthz for the container health check."""
+    
+    def _respond(self, status, message):
+        body = message.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._respond(200, "ok")
+        else:
+            self._respond(404, "not found")
+    
+    def do_POST(self):
+        if self.path != "/webhook" or not self.server.watcher.webhook_secret:
+            self._respond(404, "not found")
+            return
+        
+        # Check the size before reading anything: the body isn't authenticated
+        # until its signature has been verified
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._respond(400, "invalid Content-Length")
+            return
+        if length < 0 or length > MAX_WEBHOOK_BODY:
+            self._respond(413, "payload too large")
+            return
+        body = self.rfile.read(length)
+        
+        watcher = self.server.watcher
+        if not watcher.verify_signature(body, self.headers.get("X-Hub-Signature-256", "")):
+            logger.warning("Rejected webhook with invalid signature")
+            self._respond(401, "invalid signature")
+            return
+        
+        event = self.headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            self._respond(200, "pong")
+            return
+        if event != "push":
+            self._respond(202, f"ignored {event} event")
+            return
+        
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._respond(400, "invalid JSON payload")
+            return
+        
+        # Respond right away; the deploy runs in a worker thread so GitHub's
+        # 10 second delivery timeout is never hit
+        self._respond(202, "accepted")
+        watcher.handle_push(payload)
+        # Re-poll now (in fallback-poll mode) instead of at the end of the interval
+        watcher._wakeup.set()
+    
+    def log_message(self, format, *args):
+        logger.debug(f"Webhook server: {format % args}")
+
+
 class DeployWatcher:
     def __init__(self):
         self.base_dir = Path(__file__).parent
-        self.github_token = None
         
-        # Load environment variables
+        # Load environment variables. docker compose injects .env.local through
+        # env_file and doesn't mount the file, so it is only parsed (and dotenv
+        # imported) when running outside Docker. Variables already set win.
         env_file = self.base_dir / ".env.local"
         if env_file.exists():
+            from dotenv import load_dotenv
             load_dotenv(env_file)
-            self.github_token = os.getenv("GITHUB_TOKEN")
+        self.github_token = os.getenv("GITHUB_TOKEN")
+        if not self.github_token:
+            logger.warning("⚠️  No GITHUB_TOKEN set - GitHub API calls are limited to 60 requests/hour. "
+                           "Set GITHUB_TOKEN for the 5000 requests/hour limit.")
         
         self.fe_repo_url = os.getenv("FE_REPO_URL", "https://github.com/Ayash13/Jalin-App-v2.git")
         self.be_repo_url = os.getenv("BE_REPO_URL", "https://github.com/Ayash13/JalinApp-REN.git")
         
+        # Parse repositories and build the API URLs once instead of on every poll
+        self.fe_owner, self.fe_repo = self.extract_repo_info(self.fe_repo_url)
+        self.be_owner, self.be_repo = self.extract_repo_info(self.be_repo_url)
+        self._full_names = {
+            "fe": f"{self.fe_owner}/{self.fe_repo}".lower(),
+            "be": f"{self.be_owner}/{self.be_repo}".lower(),
+        }
+        self._commit_urls = {
+            "fe": f"https://api.github.com/repos/{self.fe_owner}/{self.fe_repo}/commits/main",
+            "be": f"https://api.github.com/repos/{self.be_owner}/{self.be_repo}/commits/main",
+        }
+        self._compare_urls = {
+            "fe": f"https://api.github.com/repos/{self.fe_owner}/{self.fe_repo}/compare/",
+            "be": f"https://api.github.com/repos/{self.be_owner}/{self.be_repo}/compare/",
+        }
+        
         self.fe_last_sha = None
         self.be_last_sha = None
         
+        # Conditional-request state per repository ("fe"/"be"): a 304 Not Modified
+        # reply has no body and doesn't count against the rate limit
+        self._etag = {"fe": None, "be": None}
+        self._cached_sha = {"fe": None, "be": None}
+        
+        # HTTP/2 client: one TLS connection to api.github.com is kept alive across
+        # polls and the concurrent frontend/backend lookups are multiplexed over it
+        headers = {"Accept": "application/vnd.github+json", "User-Agent": USER_AGENT}
+        if self.github_token:
+            headers["Authorization"] = f"token {self.github_token}"
+        self.client = httpx.Client(http2=True, headers=headers, timeout=10.0)
+        
+        # Discover SHAs with git ls-remote over the git protocol instead of the API
+        self.use_git_lsremote = os.getenv("USE_GIT_LSREMOTE", "0") == "1"
+        
+        # GraphQL needs a token; disabled for good if the token is rejected
+        self._graphql_enabled = bool(self.github_token)
+        self._graphql_body = {
+            "query": COMMITS_QUERY,
+            "variables": {
+                "feOwner": self.fe_owner, "feName": self.fe_repo,
+                "beOwner": self.be_owner, "beName": self.be_repo,
+                "ref": "refs/heads/main",
+            },
+        }
+        
+        # Last rate-limit figures reported by GitHub
+        self._rate_limit_remaining = None
+        self._rate_limit_reset = None
+        
         # Polling interval in seconds (5 minutes)
         self.poll_interval = int(os.getenv("POLL_INTERVAL", "300"))
+        
+        # Polls start at the floor interval and double while nothing changes,
+        # up to poll_interval, so activity is picked up quickly while quiet
+        # periods cost few requests
+        self.min_poll_interval = min(int(os.getenv("POLL_MIN_INTERVAL", "10")), self.poll_interval)
+        self._current_interval = self.min_poll_interval
+        # SHAs returned by the previous poll; only a change in these counts as
+        # activity (the deployed SHAs lag behind while a deploy runs or fails)
+        self._last_seen_sha = {"fe": None, "be": None}
+        
+        # When running in Docker, use the mounted project directory
+        if Path("/.dockerenv").exists():
+            self.compose_dir = Path("/app/project")
+        else:
+            self.compose_dir = self.base_dir
+        
+        # Deployment agent, created on first redeploy and reused afterwards so its
+        # HTTP session and settings carry over. The thread running the current
+        # code update is kept so a timed-out update is never run twice at once.
+        self._agent = None
+        self._update_thread = None
+        
+        # Debounce window for bursts of commits: updates detected while a redeploy
+        # is pending only refresh the SHAs to deploy
+        self.debounce_secs = int(os.getenv("DEPLOY_DEBOUNCE", "30"))
+        self._debounce_lock = threading.Lock()
+        self._pending_since = None
+        self._pending_sha = {"fe": None, "be": None}
+        
+        # Single-flight guard: only one redeploy runs at a time. A redeploy requested
+        # while one is running is dropped and the repositories are checked again
+        # once it finishes, so commits that landed mid-deploy aren't lost.
+        self._deploy_lock = threading.Lock()
+        self._redeploy_pending = False
+        
+        # SHAs of the last failed deploy and when it may be retried, so a broken
+        # commit isn't cloned and rebuilt again on every poll
+        self._deploy_failure = None
+        
+        # _wakeup cuts the wait between polls short (webhook received, shutdown);
+        # _stop ends the main loop
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        
+        # GitHub push webhooks (enabled when a secret is configured)
+        self.webhook_secret = os.getenv("WEBHOOK_SECRET")
+        self.webhook_port = int(os.getenv("WEBHOOK_PORT", "9000"))
+        
+        # Deployed SHAs and poll ETags survive restarts, so commits pushed while
+        # the watcher was down are still deployed and the first poll can be a 304.
+        # Kept in the project directory, which outlives the agent container.
+        self.state_file = self.compose_dir / ".watcher_state.json"
+        self._load_state()
     
-    def get_latest_commit_sha(self, owner, repo, branch="main"):
-        """Get the latest commit SHA from GitHub API"""
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{branch}"
-        headers = {"Authorization": f"token {self.github_token}"} if self.github_token else {}
+    def _load_state(self):
+        """Restore the last deployed SHAs and poll ETags saved by _save_state"""
+        try:
+            with open(self.state_file, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
         
+        self.fe_last_sha = state.get("fe_sha")
+        self.be_last_sha = state.get("be_sha")
+        for key in ("fe", "be"):
+            # An ETag is only usable together with the SHA it was served with
+            if state.get(f"{key}_etag") and state.get(f"{key}_cached_sha"):
+                self._etag[key] = state[f"{key}_etag"]
+                self._cached_sha[key] = state[f"{key}_cached_sha"]
+        logger.info(f"Restored deployed commits from {self.state_file.name}")
+    
+    def _save_state(self):
+        """Save the deployed SHAs and poll ETags, atomically so a crash mid-write
+        never leaves a truncated file behind"""
+        state = {
+            "fe_sha": self.fe_last_sha,
+            "be_sha": self.be_last_sha,
+            "fe_etag": self._etag["fe"],
+            "be_etag": self._etag["be"],
+            "fe_cached_sha": self._cached_sha["fe"],
+            "be_cached_sha": self._cached_sha["be"],
+        }
+        tmp_file = self.state_file.with_name(self.state_file.name + ".tmp")
         try:
-            response = requests.get(api_url, headers=headers, timeout=10)
+            with open(tmp_file, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            logger.warning(f"Could not save watcher state: {e}")
+    
+    def get_latest_commit_sha(self, key):
+        """Get the latest commit SHA on main of the "fe" or "be" repository from the GitHub API.
+        The ETag of the last reply is sent back so an unchanged branch costs a
+        bodyless 304 instead of a full commit payload."""
+        headers = {"If-None-Match": self._etag[key]} if self._etag[key] else None
+        
+        try:
+            response = self.client.get(self._commit_urls[key], headers=headers)
+            self._record_rate_limit(response)
+            if response.status_code == 304:
+                return self._cached_sha[key]
             if response.status_code == 200:
-                return response.json().get("sha")
+                sha = response.json().get("sha")
+                self._etag[key] = response.headers.get("ETag")
+                self._cached_sha[key] = sha
+                return sha
             else:
                 logger.error(f"Failed to get commit SHA: {response.status_code}")
                 return None
@@ -56,26 +313,139 @@ class DeployWatcher:
             logger.error(f"Error checking for updates: {e}")
             return None
     
+    def _graphql_check(self):
+        """Get the latest frontend and backend commit SHAs with a single GraphQL query.
+        Returns (fe_sha, be_sha), or None if the query failed and REST should be used."""
+        try:
+            response = self.client.post("https://api.github.com/graphql", json=self._graphql_body)
+            self._record_rate_limit(response)
+            # GitHub also answers 403 for (secondary) rate limits; those only
+            # fall back to REST for this poll
+            rate_limited = response.status_code == 403 and (
+                "Retry-After" in response.headers
+                or response.headers.get("X-RateLimit-Remaining") == "0"
+            )
+            if rate_limited:
+                logger.warning("GraphQL API rate limited, using REST API for this check")
+                return None
+            if response.status_code in (401, 403):
+                logger.warning(f"GraphQL API not available for this token ({response.status_code}), using REST API")
+                self._graphql_enabled = False
+                return None
+            if response.status_code != 200:
+                logger.error(f"GraphQL commit query failed: {response.status_code}")
+                return None
+            
+            result = response.json()
+            errors = result.get("errors")
+            if errors:
+                # Only a token that can't see the repositories turns GraphQL off for
+                # good; anything else (e.g. RATE_LIMITED) falls back for this poll only
+                if any(error.get("type") in GRAPHQL_AUTH_ERRORS for error in errors):
+                    logger.warning(f"GraphQL API not available for this token, using REST API: {errors[0].get('message')}")
+                    self._graphql_enabled = False
+                else:
+                    logger.warning(f"GraphQL commit query returned errors, using REST API for this check: {errors[0].get('message')}")
+                return None
+            
+            def head_sha(alias):
+                ref = (result.get("data", {}).get(alias) or {}).get("ref") or {}
+                return ref.get("target", {}).get("oid")
+            
+            return head_sha("fe"), head_sha("be")
+        except Exception as e:
+            logger.error(f"Error running GraphQL commit query: {e}")
+            return None
+    
+    def _check_via_git(self, repo_url, branch="main"):
+        """Get the latest commit SHA with git ls-remote. It transfers ~100 bytes and
+        doesn't count against the GitHub API rate limit. Returns None on failure."""
+        env = os.environ.copy()
+        env["GIT_TERMINAL_PROMPT"] = "0"
+        if self.github_token:
+            # Pass the token as an HTTP header through the environment so it never
+            # appears in the process list
+            credentials = base64.b64encode(f"x-access-token:{self.github_token}".encode()).decode()
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.https://github.com/.extraheader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+            })
+        
+        try:
+            result = subprocess.run(
+                ["git", "ls-remote", repo_url, f"refs/heads/{branch}"],
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=10
+            )
+            if result.returncode != 0 or not result.stdout.strip():
+                logger.error(f"git ls-remote failed for {repo_url}: {result.stderr.strip()}")
+                return None
+            return result.stdout.split()[0]
+        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+            logger.error(f"Error running git ls-remote: {e}")
+            return None
+    
+    def _record_rate_limit(self, response):
+        """Remember the rate-limit headers of a GitHub API response"""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            self._rate_limit_remaining = int(remaining)
+            self._rate_limit_reset = int(reset)
+    
+    def rate_limit_wait(self):
+        """Minimum seconds until the next poll so the API rate limit lasts until it resets.
+        With fewer than RATE_LIMIT_LOW_WATER requests left the remaining ones are
+        spread evenly over the rest of the window; with none left, wait for the reset."""
+        if self._rate_limit_remaining is None or self._rate_limit_remaining >= RATE_LIMIT_LOW_WATER:
+            return 0
+        until_reset = max(0, self._rate_limit_reset - time.time())
+        if self._rate_limit_remaining <= 0:
+            return until_reset
+        return until_reset / self._rate_limit_remaining
+    
     def extract_repo_info(self, repo_url):
         """Extract owner and repo name from GitHub URL"""
-        repo_url = repo_url.rstrip('/')
-        if repo_url.endswith('.git'):
-            repo_url = repo_url[:-4]
-        
-        if 'github.com' in repo_url:
-            parts = repo_url.split('github.com/')[-1].split('/')
-            if len(parts) >= 2:
-                return parts[0], parts[1]
+        match = GITHUB_REPO_RE.search(repo_url)
+        if match:
+            return match.group(1), match.group(2)
         raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
     
     def check_for_updates(self):
         """Check if there are new commits in either repository"""
         try:
-            fe_owner, fe_repo = self.extract_repo_info(self.fe_repo_url)
-            be_owner, be_repo = self.extract_repo_info(self.be_repo_url)
+            # git ls-remote (if enabled) is off the API rate limit entirely;
+            # otherwise both SHAs in one GraphQL request when possible
+            shas = None
+            if self.use_git_lsremote:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    fe_future = executor.submit(self._check_via_git, self.fe_repo_url)
+                    be_future = executor.submit(self._check_via_git, self.be_repo_url)
+                    shas = fe_future.result(), be_future.result()
+                if None in shas:
+                    shas = None
+            if shas is None and self._graphql_enabled:
+                shas = self._graphql_check()
             
-            fe_sha = self.get_latest_commit_sha(fe_owner, fe_repo)
-            be_sha = self.get_latest_commit_sha(be_owner, be_repo)
+            if shas is not None:
+                fe_sha, be_sha = shas
+            else:
+                # REST fallback: the two lookups are independent, so run them
+                # concurrently. Polls themselves stay serial across cycles.
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    fe_future = executor.submit(self.get_latest_commit_sha, "fe")
+                    be_future = executor.submit(self.get_latest_commit_sha, "be")
+                    fe_sha, be_sha = fe_future.result(), be_future.result()
+            
+            # A repository without a known SHA yet (initial fetch still running or
+            # failed) takes this one as its baseline rather than counting as updated
+            if self.fe_last_sha is None:
+                self.fe_last_sha = fe_sha
+            if self.be_last_sha is None:
+                self.be_last_sha = be_sha
             
             fe_updated = fe_sha and fe_sha != self.fe_last_sha
             be_updated = be_sha and be_sha != self.be_last_sha
@@ -94,141 +464,354 @@ class DeployWatcher:
             logger.error(f"Error checking for updates: {e}")
             return False, None, None
     
-    def trigger_redeploy(self):
-        """Trigger a redeploy - optimized for speed"""
+    def _needs_rebuild(self, key, old_sha, new_sha):
+        """Whether the commits between old_sha and new_sha of the "fe" or "be"
+        repository touch anything besides top-level docs and CI config (NO_REBUILD_RE).
+        Errs on the side of
+        rebuilding when the changed files can't be determined."""
+        if not old_sha or not new_sha:
+            return True
+        try:
+            response = self.client.get(f"{self._compare_urls[key]}{old_sha}...{new_sha}")
+            self._record_rate_limit(response)
+            if response.status_code != 200:
+                logger.warning(f"Could not list changed files ({response.status_code}), rebuilding")
+                return True
+            files = response.json().get("files") or []
+            if not files or len(files) >= COMPARE_FILES_LIMIT:
+                return True
+            return any(not NO_REBUILD_RE.search(f.get("filename", "")) for f in files)
+        except Exception as e:
+            logger.warning(f"Could not list changed files ({e}), rebuilding")
+            return True
+    
+    def _run_update(self, services, timeout):
+        """Run deploy_agent.run_update in-process for the given services, giving up
+        after timeout seconds.
+        Returns its exit code, or None if it timed out or is still running from a
+        previous timeout (the update can't be killed, only abandoned; every network
+        call and command in the agent has its own timeout, so it still ends)."""
+        if self._update_thread is not None and self._update_thread.is_alive():
+            logger.error("❌ Previous code update is still running, not starting another")
+            return None
+        
+        if self._agent is None:
+            self._agent = DeploymentAgent()
+        
+        result = {}
+        
+        def update():
+            try:
+                result["returncode"] = run_update(self.fe_repo_url, self.be_repo_url, agent=self._agent, services=services)
+            except Exception as e:
+                logger.error(f"Deployment agent failed: {e}")
+                result["returncode"] = 1
+        
+        self._update_thread = threading.Thread(target=update, daemon=True)
+        self._update_thread.start()
+        self._update_thread.join(timeout)
+        if self._update_thread.is_alive():
+            logger.error(f"❌ Deployment agent timed out after {timeout}s")
+            return None
+        return result.get("returncode")
+    
+    def trigger_redeploy(self, fe_sha=None, be_sha=None, fe_updated=True, be_updated=True):
+        """Trigger a redeploy - optimized for speed.
+        The code of both repositories is always updated, but only the services
+        whose repository changed more than top-level docs are rebuilt. On success the given SHAs are recorded as
+        deployed. Returns False without doing anything if another redeploy is
+        already running."""
+        if not self._deploy_lock.acquire(blocking=False):
+            logger.info("Redeploy already in progress, will check for new commits afterwards")
+            self._redeploy_pending = True
+            return False
+        
         logger.info("🚀 Triggering redeployment...")
         
         try:
-            # Run the deployment agent to pull latest code
-            # Set a timeout to prevent hanging
-            result = subprocess.run(
-                [sys.executable, str(self.base_dir / "deploy_agent.py"),
-                 "--fe-repo", self.fe_repo_url,
-                 "--be-repo", self.be_repo_url],
-                cwd=self.base_dir,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout
-            )
+            succeeded = self._redeploy(fe_sha, be_sha, fe_updated, be_updated)
+            if succeeded:
+                self._deploy_failure = None
+            else:
+                self._record_deploy_failure(fe_sha, be_sha)
+            return succeeded
+        finally:
+            self._deploy_lock.release()
+            if self._redeploy_pending:
+                self._redeploy_pending = False
+                # Re-check GitHub for commits pushed while this deploy was running
+                self.schedule_redeploy()
+    
+    def _redeploy(self, fe_sha, be_sha, fe_updated, be_updated):
+        """Update the code and rebuild the changed services. Returns True on success."""
+        try:
+            services = [
+                service for service, key, updated, old_sha, new_sha in (
+                    ("frontend", "fe", fe_updated, self.fe_last_sha, fe_sha),
+                    ("backend", "be", be_updated, self.be_last_sha, be_sha),
+                )
+                if updated and self._needs_rebuild(key, old_sha, new_sha)
+            ]
+            # The deployment agent pulls the latest code of both repositories, then
+            # rebuilds and recreates only the changed services (never itself)
+            if services:
+                logger.info(f"Updating code and rebuilding {', '.join(services)}...")
+            else:
+                logger.info("Only top-level docs or CI config changed, updating code without rebuilding...")
+            returncode = self._run_update(services, timeout=3600)  # 1 hour timeout, includes the builds
             
-            if result.returncode == 0:
-                logger.info("✅ Code updated. Rebuilding and restarting services...")
-                
-                # Check if we're inside Docker - if so, we need to use docker CLI from host
-                # First try docker compose (v2), then docker-compose (v1)
-                compose_commands = [
-                    (["docker", "compose"], "-p"),  # v2 uses -p
-                    (["docker-compose"], "--project-name")  # v1 uses --project-name
-                ]
-                
-                rebuild_result = None
-                for cmd_base, project_flag in compose_commands:
-                    try:
-                        # Test if command is available
-                        test_result = subprocess.run(
-                            cmd_base + ["version"],
-                            capture_output=True,
-                            check=False,
-                            timeout=5
-                        )
-                        if test_result.returncode == 0:
-                            logger.info(f"Using {' '.join(cmd_base)} for rebuild...")
-                            # Only rebuild and restart frontend and backend, not the agent itself
-                            # When running in Docker, use the mounted project directory
-                            if Path("/.dockerenv").exists():
-                                compose_dir = Path("/app/project")
-                            else:
-                                compose_dir = self.base_dir
-                            
-                            rebuild_cmd = cmd_base + [project_flag, "jalindeploy", "up", "-d", "--build", "--force-recreate", "frontend", "backend"]
-                            rebuild_result = subprocess.run(
-                                rebuild_cmd,
-                                cwd=compose_dir,
-                                capture_output=True,
-                                text=True,
-                                timeout=1800  # 30 minute timeout for builds
-                            )
-                            break
-                    except (FileNotFoundError, subprocess.TimeoutExpired):
-                        continue
-                
-                if rebuild_result is None:
-                    logger.error("❌ Neither 'docker compose' nor 'docker-compose' found!")
-                    return False
-                
-                if rebuild_result.returncode == 0:
+            if returncode == 0:
+                if services:
                     logger.info("✅ Redeployment successful! Services restarted.")
-                    return True
                 else:
-                    logger.error(f"❌ Failed to restart services")
-                    logger.error(f"stdout: {rebuild_result.stdout}")
-                    logger.error(f"stderr: {rebuild_result.stderr}")
-                    return False
+                    logger.info("✅ Code updated, no rebuild needed")
+                # Update last known SHAs
+                if fe_sha:
+                    self.fe_last_sha = fe_sha
+                if be_sha:
+                    self.be_last_sha = be_sha
+                self._save_state()
+                return True
             else:
-                logger.error(f"❌ Failed to update code (exit code: {result.returncode})")
-                if result.stdout:
-                    logger.error(f"stdout: {result.stdout[-1000:]}")  # Last 1000 chars
-                if result.stderr:
-                    logger.error(f"stderr: {result.stderr[-1000:]}")  # Last 1000 chars
+                logger.error(f"❌ Failed to update and restart services (exit code: {returncode})")
                 return False
         except Exception as e:
             logger.error(f"Error triggering redeploy: {e}")
             return False
     
-    def run(self):
-        """Main monitoring loop"""
-        logger.info("=" * 60)
-        logger.info("🔄 Auto-Deploy Watcher Started")
-        logger.info("=" * 60)
-        logger.info(f"Frontend: {self.fe_repo_url}")
-        logger.info(f"Backend: {self.be_repo_url}")
-        logger.info(f"Polling interval: {self.poll_interval} seconds")
-        logger.info("=" * 60)
+    def _record_deploy_failure(self, fe_sha, be_sha):
+        """Hold off retrying a failed deploy of these SHAs, doubling the wait after
+        every further failure up to DEPLOY_RETRY_MAX"""
+        failure = self._deploy_failure
+        attempts = failure["attempts"] + 1 if failure and failure["shas"] == (fe_sha, be_sha) else 1
+        delay = min(self.poll_interval * 2 ** (attempts - 1), DEPLOY_RETRY_MAX)
+        self._deploy_failure = {"shas": (fe_sha, be_sha), "attempts": attempts, "retry_at": time.monotonic() + delay}
+        logger.warning(f"Deploy failed ({attempts} attempt(s)); not retrying these commits for {int(delay)}s")
+    
+    def deploy_backed_off(self, fe_sha, be_sha):
+        """Whether a deploy of these SHAs recently failed and shouldn't be retried yet"""
+        failure = self._deploy_failure
+        return bool(failure and failure["shas"] == (fe_sha, be_sha) and time.monotonic() < failure["retry_at"])
+    
+    def verify_signature(self, body, signature_header):
+        """Check a webhook body against its X-Hub-Signature-256 header"""
+        if not self.webhook_secret or not signature_header.startswith("sha256="):
+            return False
+        expected = hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(f"sha256={expected}", signature_header)
+    
+    def handle_push(self, payload):
+        """Redeploy if a push webhook brings a new commit on main"""
+        if payload.get("ref") != "refs/heads/main" or payload.get("deleted"):
+            return
+        
+        full_name = payload.get("repository", {}).get("full_name", "").lower()
+        sha = payload.get("after")
+        if full_name == self._full_names["fe"]:
+            repo_key, last_sha = "fe", self.fe_last_sha
+        elif full_name == self._full_names["be"]:
+            repo_key, last_sha = "be", self.be_last_sha
+        else:
+            logger.info(f"Ignoring push webhook for unwatched repository {full_name}")
+            return
+        
+        if not sha or sha == last_sha:
+            return
         
-        # Get initial commit SHAs
+        logger.info(f"🔔 Push webhook: {full_name} is now at {sha[:8]} (was {last_sha[:8] if last_sha else 'none'})")
+        if repo_key == "fe":
+            self.schedule_redeploy(fe_sha=sha)
+        else:
+            self.schedule_redeploy(be_sha=sha)
+    
+    def schedule_redeploy(self, fe_sha=None, be_sha=None):
+        """Redeploy once the debounce window has passed, so a burst of pushes
+        results in a single deploy of the latest commits.
+        Returns True if this call opened a new window."""
+        with self._debounce_lock:
+            if fe_sha:
+                self._pending_sha["fe"] = fe_sha
+            if be_sha:
+                self._pending_sha["be"] = be_sha
+            if self._pending_since is not None:
+                logger.info("Redeploy already scheduled, including these commits")
+                return False
+            self._pending_since = time.monotonic()
+        
+        logger.info(f"Redeploying in {self.debounce_secs}s (waiting for further commits)...")
+        timer = threading.Timer(self.debounce_secs, self._debounced_redeploy)
+        timer.daemon = True
+        timer.start()
+        return True
+    
+    def _debounced_redeploy(self):
+        """End of the debounce window: re-check GitHub and deploy the latest SHAs"""
+        with self._debounce_lock:
+            self._pending_since = None
+            pending = self._pending_sha
+            self._pending_sha = {"fe": None, "be": None}
+        
+        # Fall back to the SHAs seen during the window if GitHub can't be reached
+        _, fe_sha, be_sha = self.check_for_updates()
+        fe_sha = fe_sha or pending["fe"]
+        be_sha = be_sha or pending["be"]
+        fe_updated = bool(fe_sha and fe_sha != self.fe_last_sha)
+        be_updated = bool(be_sha and be_sha != self.be_last_sha)
+        if fe_updated or be_updated:
+            self.start_redeploy(fe_sha, be_sha, fe_updated, be_updated)
+    
+    def start_redeploy(self, fe_sha=None, be_sha=None, fe_updated=True, be_updated=True):
+        """Run trigger_redeploy on a background thread so polling and webhooks keep
+        being served during a long rebuild. Returns False if a redeploy is already
+        running or these SHAs recently failed to deploy."""
+        if self.deploy_backed_off(fe_sha, be_sha):
+            logger.info("Last deploy of these commits failed, waiting before retrying")
+            return False
+        if self._deploy_lock.locked():
+            logger.info("Redeploy already in progress, will check for new commits afterwards")
+            self._redeploy_pending = True
+            return False
+        threading.Thread(
+            target=self.trigger_redeploy, args=(fe_sha, be_sha, fe_updated, be_updated), daemon=True
+        ).start()
+        return True
+    
+    def start_http_server(self):
+        """Serve GET /healthz and, if enabled, GitHub webhooks on POST /webhook
+        in a background thread"""
+        server = ThreadingHTTPServer(("0.0.0.0", self.webhook_port), WebhookHandler)
+        server.watcher = self
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        endpoints = "GET /healthz, POST /webhook" if self.webhook_secret else "GET /healthz"
+        logger.info(f"HTTP server listening on port {self.webhook_port} ({endpoints})")
+        return server, thread
+    
+    def _load_initial_shas(self):
+        """Fetch the starting commit SHAs of both repositories in parallel.
+        Runs in the background so startup (and the health check) never waits on GitHub."""
         try:
-            fe_owner, fe_repo = self.extract_repo_info(self.fe_repo_url)
-            be_owner, be_repo = self.extract_repo_info(self.be_repo_url)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                fe_future = executor.submit(self.get_latest_commit_sha, "fe")
+                be_future = executor.submit(self.get_latest_commit_sha, "be")
+                fe_sha, be_sha = fe_future.result(), be_future.result()
             
-            self.fe_last_sha = self.get_latest_commit_sha(fe_owner, fe_repo)
-            self.be_last_sha = self.get_latest_commit_sha(be_owner, be_repo)
+            # Don't overwrite a baseline the first poll already established
+            if self.fe_last_sha is None:
+                self.fe_last_sha = fe_sha
+            if self.be_last_sha is None:
+                self.be_last_sha = be_sha
             
             logger.info(f"Initial commit SHAs:")
             logger.info(f"  Frontend: {self.fe_last_sha[:8] if self.fe_last_sha else 'unknown'}")
             logger.info(f"  Backend: {self.be_last_sha[:8] if self.be_last_sha else 'unknown'}")
         except Exception as e:
             logger.error(f"Failed to get initial commits: {e}")
+    
+    def run(self, fallback_poll=False):
+        """Main monitoring loop.
+        Reacts to push webhooks when WEBHOOK_SECRET is set; polls GitHub when no
+        secret is configured or when fallback_poll is requested."""
+        poll = fallback_poll or not self.webhook_secret
+        
+        logger.info("=" * 60)
+        logger.info("🔄 Auto-Deploy Watcher Started")
+        logger.info("=" * 60)
+        logger.info(f"Frontend: {self.fe_repo_url}")
+        logger.info(f"Backend: {self.be_repo_url}")
+        if self.webhook_secret:
+            logger.info(f"Webhooks: enabled on port {self.webhook_port}")
+        if poll:
+            logger.info(f"Polling interval: {self.min_poll_interval}-{self.poll_interval} seconds")
+        logger.info("=" * 60)
+        
+        # docker stop sends SIGTERM: stop right away instead of after the current wait
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        
+        # Be ready (health check passing) straight away; initial SHAs are
+        # fetched in the background
+        self.start_http_server()
+        threading.Thread(target=self._load_initial_shas, daemon=True).start()
+        
+        if not poll:
+            # Webhook-only mode: nothing to do on this thread but wait
+            try:
+                self._stop.wait()
+                logger.info("👋 Watcher stopped")
+            except KeyboardInterrupt:
+                logger.info("\n👋 Watcher stopped by user")
+            return
         
         # Main loop
-        while True:
+        while not self._stop.is_set():
             try:
                 logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checking for updates...")
                 
                 has_updates, fe_sha, be_sha = self.check_for_updates()
                 
-                if has_updates:
-                    if self.trigger_redeploy():
-                        # Update last known SHAs
-                        if fe_sha:
-                            self.fe_last_sha = fe_sha
-                        if be_sha:
-                            self.be_last_sha = be_sha
-                else:
+                new_commits = any(
+                    sha and self._last_seen_sha[key] and sha != self._last_seen_sha[key]
+                    for key, sha in (("fe", fe_sha), ("be", be_sha))
+                )
+                if fe_sha:
+                    self._last_seen_sha["fe"] = fe_sha
+                if be_sha:
+                    self._last_seen_sha["be"] = be_sha
+                
+                if has_updates and not self.deploy_backed_off(fe_sha, be_sha):
+                    self.schedule_redeploy(fe_sha, be_sha)
+                elif not has_updates:
                     logger.info("No updates detected. Waiting...")
                 
+                if new_commits:
+                    # Activity: go back to polling at the floor interval
+                    self._current_interval = self.min_poll_interval
+                else:
+                    self._current_interval = min(self._current_interval * 2, self.poll_interval)
+                
             except KeyboardInterrupt:
                 logger.info("\n👋 Watcher stopped by user")
                 break
             except Exception as e:
                 logger.error(f"Error in main loop: {e}")
             
-            # Wait before next check
-            time.sleep(self.poll_interval)
+            # Wait before next check, until the reset if the API rate limit is nearly exhausted
+            wait = self.rate_limit_wait()
+            if wait > self._current_interval:
+                logger.warning(f"GitHub rate limit running low ({self._rate_limit_remaining} left), slowing polls to every {int(wait)}s")
+                self._current_interval = wait
+            # Jitter keeps watchers sharing an IP from polling in lockstep
+            try:
+                self._wakeup.wait(self._current_interval * random.uniform(0.8, 1.2))
+            except KeyboardInterrupt:
+                logger.info("\n👋 Watcher stopped by user")
+                break
+            self._wakeup.clear()
+        else:
+            logger.info("👋 Watcher stopped")
+    
+    def stop(self):
+        """Stop the main loop, interrupting the wait between polls"""
+        self._stop.set()
+        self._wakeup.set()
 
 
 def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="Auto-deploy watcher for the frontend and backend repositories"
+    )
+    parser.add_argument(
+        "--fallback-poll",
+        action="store_true",
+        help="Keep polling GitHub even when webhooks are enabled"
+    )
+    
+    args = parser.parse_args()
+    
     watcher = DeployWatcher()
-    watcher.run()
+    watcher.run(fallback_poll=args.fallback_poll)
 
 
 if __name__ == "__main__":